@@ -2,9 +2,18 @@ import streamlit as st
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 import matplotlib.colors as mcolors
+from matplotlib.collections import PatchCollection
+from matplotlib.figure import Figure
 from matplotlib.lines import Line2D
+import numpy as np
 import pandas as pd
+import bisect
+import functools
+import heapq
+import io
+import math
 import random
+from fractions import Fraction
 
 # --- Maximize page width and remove side padding ---
 st.set_page_config(layout="wide")
@@ -60,80 +69,231 @@ for i in range(num_jobs):
         burst = st.number_input(f"Burst Time for J{i+1}", value=default_burst, key=f"burst_{i}")
     processes.append({'id': f'J{i+1}', 'arrival_time': arrival, 'burst_time': burst})
 
-# --- Run Simulation ---
-if st.button("Run Simulation"):
-    arrival_time = {p['id']: p['arrival_time'] for p in processes}
-    burst_time = {p['id']: p['burst_time'] for p in processes}
-    remaining_time = burst_time.copy()
-    start_time, end_time, job_chunks = {}, {}, {}
-
-    for job_id, total in burst_time.items():
-        chunks = []
-        remaining = total
-        while remaining > 0:
-            chunk = min(chunk_unit, remaining)
-            chunks.append(chunk)
-            remaining -= chunk
-        job_chunks[job_id] = chunks
-
-    cpu_names = [f"CPU{i+1}" for i in range(num_cpus)]
-    busy_until = {cpu: 0 for cpu in cpu_names}
-    current_jobs = {cpu: None for cpu in cpu_names}
-    busy_jobs = set()
+# --- STRF Simulation ---
+def _split_chunks(burst, chunk_unit):
+    split = [divmod(total, chunk_unit) for total in burst]
+    return [n for n, _ in split], [tail for _, tail in split]
+
+def _strf_core_1cpu(arrival, burst, chunk_unit, quantum_time, capture):
+    num_jobs = len(arrival)
+    remaining = list(burst)
+    start_time, end_time = [None] * num_jobs, [None] * num_jobs
+    full_chunks, tail_chunk = _split_chunks(burst, chunk_unit)
+
+    gantt_data, queue_snapshots = [], []
+    by_arrival = sorted(range(num_jobs), key=arrival.__getitem__)
+    next_arrival = 0
+    current_time = 0
+    jobs_completed = 0
+    ready = []
+
+    def admit_arrivals():
+        nonlocal next_arrival
+        while next_arrival < num_jobs and arrival[by_arrival[next_arrival]] <= current_time:
+            j = by_arrival[next_arrival]
+            bisect.insort(ready, (remaining[j], arrival[j], j))
+            next_arrival += 1
+
+    def capture_queue_state(time):
+        if capture and ready:
+            queue_snapshots.append((time, [(j, rem) for rem, _, j in ready]))
+
+    admit_arrivals()
+    capture_queue_state(current_time)
+
+    while jobs_completed < num_jobs:
+        if not ready:
+            current_time = arrival[by_arrival[next_arrival]]
+            admit_arrivals()
+        capture_queue_state(current_time)
+
+        job = ready.pop(0)[2]
+        if full_chunks[job] > 0:
+            chunk = chunk_unit
+            full_chunks[job] -= 1
+        else:
+            chunk = tail_chunk[job]
+        if start_time[job] is None:
+            start_time[job] = current_time
+        remaining[job] -= chunk
+        gantt_data.append((current_time, 0, job, chunk))
+        if remaining[job] <= 0:
+            end_time[job] = current_time + chunk
+            jobs_completed += 1
+
+        # The CPU is next free at the later of chunk end and the quantum boundary
+        current_time = max(current_time + chunk, current_time + quantum_time)
+        admit_arrivals()
+        if remaining[job] > 0:
+            bisect.insort(ready, (remaining[job], arrival[job], job))
+
+    return gantt_data, queue_snapshots, start_time, end_time
+
+def _strf_core(arrival, burst, chunk_unit, quantum_time, num_cpus, capture):
+    if num_cpus == 1:
+        return _strf_core_1cpu(arrival, burst, chunk_unit, quantum_time, capture)
+
+    num_jobs = len(arrival)
+    remaining = list(burst)
+    start_time, end_time = [None] * num_jobs, [None] * num_jobs
+    full_chunks, tail_chunk = _split_chunks(burst, chunk_unit)
+
+    current_job = [-1] * num_cpus
+    busy_mask = 0  # bit c is set while CPU c is running a chunk
+    all_busy = (1 << num_cpus) - 1
     gantt_data, queue_snapshots = [], []
     current_time = 0
     jobs_completed = 0
     next_scheduling_time = 0
+    events = [(arrival[j], 'A', j) for j in range(num_jobs) if arrival[j] > current_time]
+    heapq.heapify(events)
+    # Idle jobs that have arrived, ordered by (remaining, arrival, job)
+    ready = sorted((remaining[j], arrival[j], j) for j in range(num_jobs) if arrival[j] <= current_time)
+
+    def capture_queue_state(time):
+        if capture and ready:
+            queue_snapshots.append((time, [(j, rem) for rem, _, j in ready]))
+
+    capture_queue_state(current_time)
 
-    def capture_queue_state(time, available_jobs):
-        queue = sorted(
-            [j for j in available_jobs if remaining_time[j] > 0],
-            key=lambda j: (remaining_time[j], arrival_time[j])
-        )
-        if queue:
-            job_info = [(j, round(remaining_time[j], 1)) for j in queue]
-            queue_snapshots.append((time, job_info))
-
-    initial_available = [p['id'] for p in processes if p['arrival_time'] <= current_time]
-    capture_queue_state(current_time, initial_available)
-
-    while jobs_completed < len(processes):
-        for cpu in cpu_names:
-            if busy_until[cpu] <= current_time and current_jobs[cpu]:
-                job_id = current_jobs[cpu]
-                busy_jobs.discard(job_id)
-                current_jobs[cpu] = None
-
-        can_schedule = current_time >= next_scheduling_time
-        available_cpus = [cpu for cpu in cpu_names if busy_until[cpu] <= current_time and current_jobs[cpu] is None]
-        available_jobs = [j for j in remaining_time if remaining_time[j] > 0 and arrival_time[j] <= current_time and j not in busy_jobs]
-
-        if can_schedule and available_cpus and available_jobs:
-            capture_queue_state(current_time, available_jobs)
-            available_jobs.sort(key=lambda j: (remaining_time[j], arrival_time[j]))
-
-            for cpu in available_cpus:
-                if not available_jobs:
-                    break
-                job = available_jobs.pop(0)
-                chunk = job_chunks[job].pop(0)
-                if job not in start_time:
+    while jobs_completed < num_jobs:
+        if current_time >= next_scheduling_time and ready and busy_mask != all_busy:
+            capture_queue_state(current_time)
+            available_cpus = [cpu for cpu in range(num_cpus) if not busy_mask >> cpu & 1]
+            selected = ready[:len(available_cpus)]
+            del ready[:len(available_cpus)]
+            for cpu, (_, _, job) in zip(available_cpus, selected):
+                if full_chunks[job] > 0:
+                    chunk = chunk_unit
+                    full_chunks[job] -= 1
+                else:
+                    chunk = tail_chunk[job]
+                if start_time[job] is None:
                     start_time[job] = current_time
-                busy_jobs.add(job)
-                current_jobs[cpu] = job
-                remaining_time[job] -= chunk
-                busy_until[cpu] = current_time + chunk
+                current_job[cpu] = job
+                busy_mask |= 1 << cpu
+                remaining[job] -= chunk
+                heapq.heappush(events, (current_time + chunk, 'C', cpu))
                 gantt_data.append((current_time, cpu, job, chunk))
-                if remaining_time[job] < 1e-3:
+                if remaining[job] <= 0:
                     end_time[job] = current_time + chunk
                     jobs_completed += 1
             next_scheduling_time = current_time + quantum_time
+            if next_scheduling_time > current_time:
+                heapq.heappush(events, (next_scheduling_time, 'Q', 0))
+
+        if not events:
+            current_time += 1
+            continue
+        current_time = events[0][0]
+        while events and events[0][0] == current_time:
+            _, kind, idx = heapq.heappop(events)
+            if kind == 'A':
+                bisect.insort(ready, (remaining[idx], arrival[idx], idx))
+            elif kind == 'C':
+                job = current_job[idx]
+                if remaining[job] > 0:
+                    bisect.insort(ready, (remaining[job], arrival[job], job))
+                busy_mask &= ~(1 << idx)
+
+    return gantt_data, queue_snapshots, start_time, end_time
 
-        next_events = [busy_until[c] for c in cpu_names if busy_until[c] > current_time]
-        next_events += [arrival_time[j] for j in arrival_time if arrival_time[j] > current_time and remaining_time[j] > 0]
-        if next_scheduling_time > current_time:
-            next_events.append(next_scheduling_time)
-        current_time = min(next_events) if next_events else current_time + 0.1
+@st.cache_data(max_entries=64)
+def run_strf(num_jobs, num_cpus, chunk_unit, quantum_time, jobs, capture):
+    # Run the kernel on integer ticks of the largest step that divides every input
+    values = [Fraction(repr(float(v))) for v in (chunk_unit, quantum_time, *(t for job in jobs for t in job))]
+    denominator = math.lcm(*(v.denominator for v in values))
+    tick = Fraction(math.gcd(*(int(v * denominator) for v in values)) or 1, denominator)
+    chunk_ticks, quantum_ticks, *job_ticks = [int(v / tick) for v in values]
+    gantt, snapshots, starts, ends = _strf_core(job_ticks[0::2], job_ticks[1::2], chunk_ticks, quantum_ticks, num_cpus, capture)
+
+    def to_time(ticks):
+        return float(ticks * tick)
+
+    gantt_data = [(to_time(t), f"CPU{cpu+1}", f"J{job+1}", to_time(chunk)) for t, cpu, job, chunk in gantt]
+    queue_snapshots = [
+        (to_time(t), [(f"J{j+1}", round(to_time(rem), 1)) for j, rem in queue]) for t, queue in snapshots
+    ]
+    start_time = {f"J{j+1}": to_time(t) for j, t in enumerate(starts)}
+    end_time = {f"J{j+1}": to_time(t) for j, t in enumerate(ends)}
+    return gantt_data, queue_snapshots, start_time, end_time
+
+# --- Gantt Chart ---
+@functools.lru_cache(maxsize=16)
+def _palette(num_jobs):
+    cmap = plt.colormaps.get_cmap('tab20')
+    return tuple(mcolors.to_hex(cmap(i / max(num_jobs, 1))) for i in range(num_jobs))
+
+@functools.lru_cache(maxsize=16)
+def _cpu_ypos(num_cpus):
+    return tuple((f"CPU{i+1}", num_cpus - i) for i in range(num_cpus))
+
+def draw_gantt(num_jobs, num_cpus, quantum_time, gantt_data, queue_snapshots, max_time):
+    fig = Figure(figsize=(18, 8))
+    ax = fig.subplots()
+    colors = {f'J{i+1}': color for i, color in enumerate(_palette(num_jobs))}
+    cpu_ypos = dict(_cpu_ypos(num_cpus))
+
+    rows = {cpu: [] for cpu in cpu_ypos}
+    for start, cpu, job, duration in gantt_data:
+        rows[cpu].append((start, duration, job))
+        ax.text(start + duration / 2, cpu_ypos[cpu], job, ha='center', va='center', color='white', fontsize=9)
+
+    for cpu, bars in rows.items():
+        if bars:
+            ax.broken_barh([(start, duration) for start, duration, _ in bars], (cpu_ypos[cpu] - 0.4, 0.8),
+                           facecolors=[colors[job] for _, _, job in bars], edgecolor='black')
+
+    quantum_xs = np.arange(0, int(max_time) + 1, quantum_time)
+    other_xs = np.setdiff1d(np.arange(int(max_time) + 1), quantum_xs)
+    ax.vlines(quantum_xs, 0, 1, transform=ax.get_xaxis_transform(), colors='red', linestyles='-', linewidth=0.5, alpha=0.6)
+    ax.vlines(other_xs, 0, 1, transform=ax.get_xaxis_transform(), colors='black', linestyles='--', alpha=0.2)
+
+    queue_y_base = -1
+    rects = []
+    for time, jobs in queue_snapshots:
+        for i, (jid, rem) in enumerate(jobs):
+            y = queue_y_base - i * 0.6
+            rects.append(patches.Rectangle((time - 0.25, y - 0.25), 0.5, 0.5))
+            ax.text(time, y, f"{jid}={rem}", ha='center', va='center', fontsize=7)
+    if rects:
+        ax.add_collection(PatchCollection(rects, facecolors='white', edgecolors='black'))
+
+    if queue_snapshots:
+        max_q = max(len(q[1]) for q in queue_snapshots)
+        ax.set_ylim(-1 - max_q * 0.6 - 0.5, num_cpus + 1)
+
+    ax.set_yticks(list(cpu_ypos.values()))
+    ax.set_yticklabels(cpu_ypos.keys())
+    ax.set_xlabel("Time (seconds)")
+    ax.set_title("STRF Gantt Chart with Quantum Scheduling")
+
+    legend_elements = [Line2D([0], [0], color='red', lw=2, label='Quantum Marker')]
+    ax.legend(handles=legend_elements, loc='upper right')
+
+    ax.grid(axis='x')
+    return fig
+
+@st.cache_data(max_entries=64)
+def render_gantt_png(num_jobs, num_cpus, quantum_time, gantt_data, queue_snapshots, max_time):
+    fig = draw_gantt(num_jobs, num_cpus, quantum_time, gantt_data, queue_snapshots, max_time)
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=200, bbox_inches='tight')
+    return buf.getvalue()
+
+# --- Run Simulation ---
+show_queue = st.checkbox("Show queue overlay", value=False)
+
+if st.button("Run Simulation"):
+    jobs = tuple((p['arrival_time'], p['burst_time']) for p in processes)
+    sim_key = hash((num_jobs, num_cpus, chunk_unit, quantum_time, jobs, show_queue))
+    if st.session_state.get('sim_key') != sim_key:
+        result = run_strf(num_jobs, num_cpus, chunk_unit, quantum_time, jobs, show_queue)
+        gantt_data, queue_snapshots, start_time, end_time = result
+        st.session_state.sim_png = render_gantt_png(num_jobs, num_cpus, quantum_time, gantt_data, queue_snapshots, max(end_time.values()))
+        st.session_state.sim_result = result
+        st.session_state.sim_key = sim_key
+    gantt_data, queue_snapshots, start_time, end_time = st.session_state.sim_result
 
     for p in processes:
         p['start_time'] = start_time[p['id']]
@@ -154,47 +314,5 @@ if st.button("Run Simulation"):
     st.dataframe(df, use_container_width=True)
     st.markdown(f"**Average Turnaround Time:** `{avg_turnaround:.2f}`")
 
-    def draw_gantt(gantt_data, queue_snapshots):
-        max_time = max(end_time.values())
-        fig, ax = plt.subplots(figsize=(18, 8))
-        cmap = plt.colormaps.get_cmap('tab20')
-        colors = {f'J{i+1}': mcolors.to_hex(cmap(i / max(len(processes), 1))) for i in range(len(processes))}
-        cpu_ypos = {cpu: num_cpus - idx for idx, cpu in enumerate(cpu_names)}
-
-        for start, cpu, job, duration in gantt_data:
-            y = cpu_ypos[cpu]
-            ax.barh(y, duration, left=start, color=colors[job], edgecolor='black')
-            ax.text(start + duration / 2, y, job, ha='center', va='center', color='white', fontsize=9)
-
-        for t in range(int(max_time) + 1):
-            if t % int(quantum_time) == 0:
-                ax.axvline(x=t, color='red', linestyle='-', linewidth=0.5, alpha=0.6)
-            else:
-                ax.axvline(x=t, color='black', linestyle='--', alpha=0.2)
-
-        queue_y_base = -1
-        for time, jobs in queue_snapshots:
-            for i, (jid, rem) in enumerate(jobs):
-                y = queue_y_base - i * 0.6
-                rect = patches.Rectangle((time - 0.25, y - 0.25), 0.5, 0.5, edgecolor='black', facecolor='white')
-                ax.add_patch(rect)
-                ax.text(time, y, f"{jid}={rem}", ha='center', va='center', fontsize=7)
-
-        if queue_snapshots:
-            max_q = max(len(q[1]) for q in queue_snapshots)
-            ax.set_ylim(-1 - max_q * 0.6 - 0.5, num_cpus + 1)
-
-        ax.set_yticks(list(cpu_ypos.values()))
-        ax.set_yticklabels(cpu_ypos.keys())
-        ax.set_xlabel("Time (seconds)")
-        ax.set_title("STRF Gantt Chart with Quantum Scheduling")
-
-        legend_elements = [Line2D([0], [0], color='red', lw=2, label='Quantum Marker')]
-        ax.legend(handles=legend_elements, loc='upper right')
-
-        plt.grid(axis='x')
-        plt.tight_layout()
-        return fig
-
     st.subheader("Gantt Chart")
-    st.pyplot(draw_gantt(gantt_data, queue_snapshots), use_container_width=True)
+    st.image(st.session_state.sim_png, use_container_width=True)